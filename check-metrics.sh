@@ -0,0 +1,75 @@
+#!/bin/bash
+# Launch the API the way the container does (python serve.py) and check /metrics
+
+set -e
+
+PORT=8000
+BASE_URL="http://localhost:${PORT}"
+LOG_FILE="${LOG_FILE:-/tmp/iris-api-check.log}"
+READY_TIMEOUT="${READY_TIMEOUT:-60}"
+
+# Colors
+GREEN='\033[0;32m'
+BLUE='\033[0;34m'
+RED='\033[0;31m'
+NC='\033[0m' # No Color
+
+echo "📊 Prometheus Metrics Check"
+echo "==========================="
+echo ""
+
+# 1. Start the server
+echo -e "${BLUE}1. Starting python serve.py...${NC}"
+python serve.py > "$LOG_FILE" 2>&1 &
+SERVER_PID=$!
+trap 'kill $SERVER_PID 2>/dev/null; wait $SERVER_PID 2>/dev/null' EXIT
+
+# 2. Wait for the model to load
+echo -e "${BLUE}2. Waiting for /health...${NC}"
+for _ in $(seq "$READY_TIMEOUT"); do
+    if curl -sf "${BASE_URL}/health" > /dev/null; then
+        break
+    fi
+    if ! kill -0 $SERVER_PID 2>/dev/null; then
+        echo -e "${RED}   ❌ Server exited, see $LOG_FILE${NC}"
+        exit 1
+    fi
+    sleep 1
+done
+if ! curl -sf "${BASE_URL}/health" > /dev/null; then
+    echo -e "${RED}   ❌ Not ready after ${READY_TIMEOUT}s, see $LOG_FILE${NC}"
+    exit 1
+fi
+echo -e "${GREEN}   ✅ Model loaded${NC}"
+
+# 3. Send a prediction so the request metrics have a sample
+echo -e "${BLUE}3. Sending a prediction...${NC}"
+curl -sf -X POST "${BASE_URL}/predict" \
+    -H "Content-Type: application/json" \
+    -d '{"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}' > /dev/null
+echo -e "${GREEN}   ✅ Prediction returned${NC}"
+
+# 4. Scrape /metrics for the series the dashboards and alerts use
+echo -e "${BLUE}4. Scraping /metrics...${NC}"
+METRICS=$(curl -sf "${BASE_URL}/metrics")
+FAILED=0
+for metric in \
+    'iris_api_requests_total{handler="/predict"' \
+    'iris_api_request_duration_seconds_bucket{handler="/predict"' \
+    'iris_api_active_requests' \
+    'iris_predictions_total' \
+    'iris_model_loaded 1.0'; do
+    if grep -qF "$metric" <<< "$METRICS"; then
+        echo -e "${GREEN}   ✅ $metric${NC}"
+    else
+        echo -e "${RED}   ❌ $metric (missing)${NC}"
+        FAILED=1
+    fi
+done
+
+echo ""
+if [ $FAILED -ne 0 ]; then
+    echo -e "${RED}❌ Metrics check failed${NC}"
+    exit 1
+fi
+echo -e "${GREEN}✅ Metrics check passed${NC}"
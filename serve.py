@@ -5,127 +5,290 @@ Uses source modules for configuration and model utilities
 Includes Prometheus metrics for monitoring
 """
 
+import asyncio
 import logging
-from fastapi import FastAPI, Request
-from pydantic import BaseModel
+import os
+import signal
+import sys
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Optional, Tuple
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, Field
 import uvicorn
-import mlflow.sklearn
-from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
 
 from src.config import (
     MLFLOW_TRACKING_URI,
     MLFLOW_EXPERIMENT_NAME,
+    MLFLOW_HTTP_REQUEST_TIMEOUT,
+    MLFLOW_HTTP_REQUEST_MAX_RETRIES,
+    MODELS_DIR,
+    TEST_DATA_PATH,
     API_HOST,
     API_PORT,
+    API_WORKERS,
+    MODEL_BACKEND,
+    SERVE_N_ESTIMATORS,
+    SERVE_MIN_TEST_ACCURACY,
+    SERVE_EARLY_EXIT,
+    MODEL_LOAD_MAX_ATTEMPTS,
+    MODEL_LOAD_RETRY_DELAY,
     FEATURE_NAMES,
-    CLASS_NAMES
+    CLASS_NAMES,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_PRECISION
 )
-from src.model_utils import make_prediction
-from src.mlflow_utils import get_latest_run
 from src.prometheus_metrics import (
-    model_loaded, api_health, record_prediction, 
-    request_duration, request_count, model_load_duration
+    model_loaded, api_health, record_prediction, model_load_duration,
+    cache_hits, cache_misses, instrumentator
 )
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-# Initialize FastAPI
-app = FastAPI(
-    title="Iris Classifier API",
-    description="Serves predictions from MLFlow-trained Random Forest model",
-    version="1.0.0"
-)
-
-# Global model
+# Global model and request batcher
 MODEL = None
+BATCHER = None
+_model_load_task: Optional[asyncio.Task] = None
+
+# uvicorn's multi-worker supervisor does not watch its workers, so a worker that
+# gives up on the model signals it to stop the whole server with a failure status.
+# Only `python serve.py` installs the handler; it exports its pid for the workers.
+MODEL_LOAD_FAILED_SIGNAL = signal.SIGUSR1
+SUPERVISOR_PID_ENV = "IRIS_API_SUPERVISOR_PID"
+_model_load_failed = False
+
+# LRU prediction cache keyed on rounded feature tuples
+_prediction_cache: "OrderedDict[Tuple[float, ...], Tuple[int, float]]" = OrderedDict()
+
+class ModelConfigError(Exception):
+    """Model load failure caused by configuration, which retrying cannot fix"""
 
 # Request/Response models
+# NaN/Infinity are rejected with a 422 before they can reach a shared batch
 class IrisFeatures(BaseModel):
     """Iris flower features"""
-    sepal_length: float
-    sepal_width: float
-    petal_length: float
-    petal_width: float
+    sepal_length: float = Field(allow_inf_nan=False)
+    sepal_width: float = Field(allow_inf_nan=False)
+    petal_length: float = Field(allow_inf_nan=False)
+    petal_width: float = Field(allow_inf_nan=False)
 
 class PredictionResponse(BaseModel):
     """Prediction response"""
     prediction: str
     confidence: float
 
-# Startup event - load model
-@app.on_event("startup")
-async def startup():
-    """Load model from MLFlow on startup"""
-    global MODEL
-    import time
-    start_time = time.time()
-    try:
-        mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
-        
-        # Get latest run from experiment
-        latest_run = get_latest_run(MLFLOW_EXPERIMENT_NAME)
-        
-        if latest_run is None:
-            raise Exception(f"Experiment '{MLFLOW_EXPERIMENT_NAME}' not found. Run train.py first!")
-        
-        run_id = latest_run.info.run_id
-        
-        # Load model
-        model_uri = f"runs:/{run_id}/iris-model"
-        MODEL = mlflow.sklearn.load_model(model_uri)
-        
-        # Record metrics
-        load_time = time.time() - start_time
-        model_load_duration.observe(load_time)
-        model_loaded.set(1)
-        api_health.set(1)
-        
-        logger.info(f"✅ Model loaded successfully from run: {run_id}")
-        logger.info(f"📂 Model type: {type(MODEL).__name__}")
-        logger.info(f"⏱️  Model load time: {load_time:.2f}s")
-    
-    except Exception as e:
-        logger.error(f"❌ Failed to load model: {e}")
-        model_loaded.set(0)
-        api_health.set(0)
-        raise
-
-
-# Middleware for tracking request metrics
-@app.middleware("http")
-async def track_metrics(request: Request, call_next):
-    """Track request metrics using Prometheus"""
-    start_time = time.time()
-    response = await call_next(request)
-    process_time = time.time() - start_time
+# Model loading
+def _load_model() -> Tuple[Any, str, str]:
+    """
+    Load the latest trained model and compile it for the serving backend
+    
+    Blocking; runs in a worker thread. MLFlow, sklearn and the backends are
+    imported here so the server can answer liveness probes while they load.
+    
+    Returns:
+        (predictor, run_id, model_type)
+    """
+    import mlflow
+    import mlflow.sklearn
+    import numpy as np
+    from src.data_utils import prepare_dataset
+    from src.mlflow_utils import configure_http_client, get_latest_run
+    from src.model_utils import (
+        build_predictor, truncate_forest, evaluate_model,
+        model_cache_lock, load_cached_model, save_cached_model
+    )
+    
+    mlflow.set_tracking_uri(MLFLOW_TRACKING_URI)
+    configure_http_client(MLFLOW_HTTP_REQUEST_TIMEOUT, MLFLOW_HTTP_REQUEST_MAX_RETRIES)
+    
+    # Get latest run from experiment
+    latest_run = get_latest_run(MLFLOW_EXPERIMENT_NAME)
+    
+    if latest_run is None:
+        raise Exception(f"Experiment '{MLFLOW_EXPERIMENT_NAME}' not found. Run train.py first!")
+    
+    run_id = latest_run.info.run_id
+    
+    # Load model from the local joblib cache, falling back to MLFlow.
+    # The lock lets one worker populate the cache while the others wait for it.
+    with model_cache_lock(MODELS_DIR):
+        sk_model = load_cached_model(MODELS_DIR, run_id)
+        if sk_model is None:
+            model_uri = f"runs:/{run_id}/iris-model"
+            sk_model = mlflow.sklearn.load_model(model_uri)
+            save_cached_model(sk_model, MODELS_DIR, run_id)
+    
+    # Predictions already run off the event loop; avoid oversubscribing cores
+    sk_model.set_params(n_jobs=1)
+    
+    X_test, y_test = prepare_dataset(TEST_DATA_PATH)
+    
+    # Optionally serve fewer trees, refusing to if held-out accuracy drops below the floor
+    if SERVE_N_ESTIMATORS:
+        truncate_forest(sk_model, SERVE_N_ESTIMATORS)
+        test_metrics = evaluate_model(sk_model, X_test, y_test, "test")
+        test_accuracy = test_metrics["test_accuracy"]
+        if test_accuracy < SERVE_MIN_TEST_ACCURACY:
+            raise ModelConfigError(
+                f"Serving {len(sk_model.estimators_)} trees gives test accuracy "
+                f"{test_accuracy:.4f}, below SERVE_MIN_TEST_ACCURACY={SERVE_MIN_TEST_ACCURACY}"
+            )
+        logger.info(
+            f"🌲 Serving {len(sk_model.estimators_)} trees "
+            f"(test accuracy: {test_accuracy:.4f})"
+        )
+    
+    # Compile the model for the configured inference backend
+    predictor = build_predictor(sk_model, MODEL_BACKEND, early_exit=SERVE_EARLY_EXIT)
+    
+    # A compiled backend must pick the same class as sklearn on the held-out set
+    if predictor is not sk_model:
+        expected = np.argmax(sk_model.predict_proba(X_test), axis=1)
+        actual = np.argmax(predictor.predict_proba(X_test), axis=1)
+        n_mismatched = int(np.count_nonzero(expected != actual))
+        if n_mismatched:
+            raise ModelConfigError(
+                f"{MODEL_BACKEND} backend disagrees with sklearn on "
+                f"{n_mismatched}/{len(X_test)} test samples"
+            )
+    return predictor, run_id, type(sk_model).__name__
+
+async def _load_and_serve_model():
+    """
+    Load the model off the event loop, then start serving predictions
+    
+    Failed loads are retried with exponential backoff. After the last attempt,
+    or straight away for a ModelConfigError, the server exits so the container runtime restarts it, instead of
+    staying up forever without a model. A worker started by `python serve.py`
+    with several workers first signals the supervisor to stop the others.
+    """
+    global MODEL, BATCHER
+    
+    delay = MODEL_LOAD_RETRY_DELAY
+    for attempt in range(1, MODEL_LOAD_MAX_ATTEMPTS + 1):
+        start_ns = time.perf_counter_ns()
+        try:
+            predictor, run_id, model_type = await asyncio.to_thread(_load_model)
+            break
+        except Exception as e:
+            logger.error(f"❌ Failed to load model (attempt {attempt}/{MODEL_LOAD_MAX_ATTEMPTS}): {e}")
+            model_loaded.set(0)
+            api_health.set(0)
+            if attempt == MODEL_LOAD_MAX_ATTEMPTS or isinstance(e, ModelConfigError):
+                # Nothing has started that needs a clean shutdown
+                logger.error("💥 Giving up on loading the model, exiting")
+                supervisor_pid = int(os.environ.get(SUPERVISOR_PID_ENV, os.getpid()))
+                if supervisor_pid != os.getpid():
+                    os.kill(supervisor_pid, MODEL_LOAD_FAILED_SIGNAL)
+                os._exit(1)
+            await asyncio.sleep(delay)
+            delay *= 2
+    
+    # Start micro-batcher so concurrent requests share one predict_proba call.
+    # Imported only now: _load_model has already pulled in its heavy dependencies.
+    from src.batcher import PredictionBatcher
+    BATCHER = PredictionBatcher(predictor)
+    BATCHER.start()
+    MODEL = predictor
     
     # Record metrics
-    endpoint = request.url.path
-    request_duration.labels(endpoint=endpoint).observe(process_time)
-    request_count.labels(
-        method=request.method, 
-        endpoint=endpoint, 
-        status=response.status_code
-    ).inc()
+    load_time = (time.perf_counter_ns() - start_ns) * 1e-9
+    model_load_duration.observe(load_time)
+    model_loaded.set(1)
+    api_health.set(1)
     
-    return response
+    logger.info(f"✅ Model loaded successfully from run: {run_id}")
+    logger.info(f"📂 Model type: {model_type} (backend: {MODEL_BACKEND})")
+    logger.info(f"⏱️  Model load time: {load_time:.2f}s")
 
 
-import time
+def _on_model_load_failed(signum, frame):
+    """Record that a worker gave up on the model, then shut uvicorn down"""
+    global _model_load_failed
+    _model_load_failed = True
+    signal.raise_signal(signal.SIGTERM)
+
+
+# Lifespan - load model in the background, stop batcher on shutdown
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start loading the model without blocking startup, and clean up on shutdown"""
+    global _model_load_task
+    _model_load_task = asyncio.create_task(_load_and_serve_model())
+    
+    yield
+    
+    if not _model_load_task.done():
+        _model_load_task.cancel()
+    if BATCHER is not None:
+        await BATCHER.stop()
+
+
+# Initialize FastAPI
+app = FastAPI(
+    title="Iris Classifier API",
+    description="Serves predictions from MLFlow-trained Random Forest model",
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
+
+
+# Validation errors echo the rejected input, which json.dumps refuses when it is
+# NaN/Infinity; orjson writes those as null so the client still gets its 422
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    """Return 422 validation errors rendered with orjson"""
+    return ORJSONResponse(status_code=422, content={"detail": jsonable_encoder(exc.errors())})
+
+
+# Prediction cache lookup
+async def _cached_predict(key: Tuple[float, ...]) -> Tuple[int, float]:
+    """Return a cached prediction for key, predicting through the batcher on a miss"""
+    cached = _prediction_cache.get(key)
+    if cached is not None:
+        _prediction_cache.move_to_end(key)
+        cache_hits.inc()
+        return cached
+    
+    cache_misses.inc()
+    result = await BATCHER.submit(list(key))
+    
+    _prediction_cache[key] = result
+    if len(_prediction_cache) > PREDICTION_CACHE_SIZE:
+        _prediction_cache.popitem(last=False)
+    return result
 
-# Health check endpoint
+# Health check endpoint - the readiness probe, 503 until the model is loaded
 @app.get("/health")
 async def health():
     """Health check endpoint"""
+    if MODEL is None:
+        return ORJSONResponse(
+            status_code=503,
+            content={"status": "unhealthy", "model_loaded": False}
+        )
     return {
         "status": "healthy",
-        "model_loaded": MODEL is not None
+        "model_loaded": True
     }
 
+# Liveness probe - answers as soon as the server is up
+@app.get("/livez")
+async def livez():
+    """Liveness probe"""
+    return {"status": "ok"}
+
 # Prediction endpoint
-@app.post("/predict", response_model=PredictionResponse)
+# Returns ORJSONResponse directly to skip Pydantic output validation;
+# PredictionResponse is kept for the OpenAPI schema only
+@app.post("/predict", responses={200: {"model": PredictionResponse}})
 async def predict(features: IrisFeatures):
     """
     Make a prediction on iris features
@@ -141,7 +304,7 @@ async def predict(features: IrisFeatures):
     ```
     """
     if MODEL is None:
-        raise Exception("Model not loaded")
+        raise HTTPException(status_code=503, detail="Model not loaded")
     
     # Prepare features
     feature_list = [
@@ -151,27 +314,21 @@ async def predict(features: IrisFeatures):
         features.petal_width
     ]
     
-    # Make prediction using model_utils
-    pred_class, confidence = make_prediction(MODEL, feature_list)
+    # Round features so floating-point jitter still hits the cache
+    key = tuple(round(v, PREDICTION_CACHE_PRECISION) for v in feature_list)
+    pred_class, confidence = await _cached_predict(key)
     
-    # Record prediction metrics
+    # Get species name from class index and record prediction metrics
     species = CLASS_NAMES[pred_class]
     record_prediction(species, confidence)
     
-    # Get species name from class index
-    species = CLASS_NAMES[pred_class]
-    
-    return PredictionResponse(
-        prediction=species,
-        confidence=confidence
-    )
+    return ORJSONResponse({
+        "prediction": species,
+        "confidence": confidence
+    })
 
-# Prometheus metrics endpoint
-@app.get("/metrics")
-async def metrics():
-    """Prometheus metrics endpoint"""
-    from fastapi.responses import Response
-    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+# Request metrics and /metrics endpoint
+instrumentator.instrument(app).expose(app, endpoint="/metrics")
 
 # Root endpoint
 @app.get("/")
@@ -182,18 +339,33 @@ async def root():
         "version": "1.0.0",
         "docs": "/docs",
         "health": "/health",
+        "livez": "/livez",
         "predict": "/predict",
         "metrics": "/metrics"
     }
 
 if __name__ == "__main__":
-    logger.info("🚀 Starting Iris Classifier API...")
+    logger.info(f"🚀 Starting Iris Classifier API with {API_WORKERS} worker(s)...")
+    if API_WORKERS > 1:
+        logger.warning("⚠️  /metrics is per worker; counters will jump between scrapes")
     logger.info(f"📚 Swagger UI: http://{API_HOST}:{API_PORT}/docs")
     logger.info(f"📖 ReDoc: http://{API_HOST}:{API_PORT}/redoc\n")
     
+    signal.signal(MODEL_LOAD_FAILED_SIGNAL, _on_model_load_failed)
+    os.environ[SUPERVISOR_PID_ENV] = str(os.getpid())
+    
+    # Multiple workers need an import string rather than the app object.
+    # Each worker loads its own model, but only the first pulls it from MLFlow;
+    # the rest wait on the cache lock and read the local joblib copy.
     uvicorn.run(
-        app,
+        "serve:app",
         host=API_HOST,
         port=API_PORT,
+        workers=API_WORKERS,
+        loop="uvloop",
+        http="httptools",
         log_level="info"
     )
+    
+    if _model_load_failed:
+        sys.exit(1)
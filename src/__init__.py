@@ -5,6 +5,7 @@ Modules:
 - config: Configuration and paths
 - data_utils: Data loading and preprocessing
 - model_utils: Model training and evaluation
+- batcher: Micro-batching of concurrent predictions
 - mlflow_utils: MLFlow integration utilities
 """
 
@@ -0,0 +1,117 @@
+"""
+Micro-batching for model predictions
+Coalesces concurrent requests into a single predict_proba call
+"""
+
+import asyncio
+import logging
+from typing import Any, List, Optional, Tuple, Union
+
+from src.model_utils import predict_batch
+
+logger = logging.getLogger(__name__)
+
+# Batching settings
+MAX_BATCH = 32
+MAX_WAIT_SECONDS = 0.005
+
+
+class PredictionBatcher:
+    """Queue pending predictions and run them through the model in batches"""
+
+    def __init__(self, model: Any, max_batch: int = MAX_BATCH, max_wait: float = MAX_WAIT_SECONDS):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """Start the background batching task on the running event loop"""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Cancel the background batching task"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def submit(self, features: List[float]) -> Tuple[int, float]:
+        """
+        Queue a single sample and wait for its batched prediction
+
+        Returns:
+            (predicted_class, confidence)
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((features, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[List[float], asyncio.Future]]:
+        """Wait for one request, then gather more until the batch is full or the window closes"""
+        batch = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.max_wait
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+
+        return batch
+
+    async def _run(self) -> None:
+        """Background loop: collect a batch, predict once, resolve every waiter"""
+        while True:
+            batch = await self._collect()
+            samples = [features for features, _ in batch]
+
+            try:
+                # Run the CPU-bound predict in a thread so the event loop keeps serving
+                preds, confidences = await asyncio.to_thread(predict_batch, self.model, samples)
+            except Exception as e:
+                logger.error(f"❌ Batch prediction failed: {e}")
+                if len(batch) == 1:
+                    self._resolve(batch, [e])
+                else:
+                    # Retry one sample at a time so a bad input only fails its own request
+                    self._resolve(batch, await asyncio.to_thread(self._predict_each, samples))
+                continue
+
+            self._resolve(batch, [
+                (int(preds[i]), float(confidences[i])) for i in range(len(batch))
+            ])
+
+    def _predict_each(self, samples: List[List[float]]) -> List[Union[Tuple[int, float], Exception]]:
+        """Predict samples individually, returning the exception in place of a failed result"""
+        results: List[Union[Tuple[int, float], Exception]] = []
+        for features in samples:
+            try:
+                preds, confidences = predict_batch(self.model, [features])
+                results.append((int(preds[0]), float(confidences[0])))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    @staticmethod
+    def _resolve(
+        batch: List[Tuple[List[float], asyncio.Future]],
+        results: List[Union[Tuple[int, float], Exception]]
+    ) -> None:
+        """Hand each waiter its result or exception"""
+        for (_, future), result in zip(batch, results):
+            # Client may have disconnected while waiting
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
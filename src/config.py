@@ -2,7 +2,10 @@
 Configuration module for ML pipeline and serving
 """
 
+import os
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Final, Tuple
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -13,6 +16,8 @@ MLRUNS_DIR = PROJECT_ROOT / "mlruns"
 # MLFlow settings
 MLFLOW_TRACKING_URI = f"file:{MLRUNS_DIR}"
 MLFLOW_EXPERIMENT_NAME = "iris_classification"
+MLFLOW_HTTP_REQUEST_TIMEOUT = 30  # seconds, only used with an http(s) tracking URI
+MLFLOW_HTTP_REQUEST_MAX_RETRIES = 3
 
 # Training settings
 TRAIN_DATA_PATH = DATA_DIR / "iris_train.json"
@@ -21,21 +26,38 @@ TEST_DATA_PATH = DATA_DIR / "iris_test.json"
 # Model settings
 MODEL_NAME = "iris-model"
 MODEL_TYPE = "RandomForestClassifier"
+MODEL_BACKEND = os.getenv("MODEL_BACKEND", "onnx")  # 'onnx', 'numba' or 'sklearn'
+SERVE_N_ESTIMATORS = int(os.getenv("SERVE_N_ESTIMATORS", "0"))  # 0 serves every trained tree
+SERVE_MIN_TEST_ACCURACY = float(os.getenv("SERVE_MIN_TEST_ACCURACY", "0.9"))  # floor for a truncated forest
+SERVE_EARLY_EXIT = os.getenv("SERVE_EARLY_EXIT", "0") == "1"  # numba backend only
+MODEL_LOAD_MAX_ATTEMPTS = int(os.getenv("MODEL_LOAD_MAX_ATTEMPTS", "5"))  # then the process exits
+MODEL_LOAD_RETRY_DELAY = float(os.getenv("MODEL_LOAD_RETRY_DELAY", "2.0"))  # seconds before the first retry, doubled after each failure
 
 # Training hyperparameters
-TRAIN_PARAMS = {
-    "n_estimators": 100,
-    "max_depth": 10,
-    "min_samples_split": 2,
-    "min_samples_leaf": 1,
-    "random_state": 42
-}
+@dataclass(frozen=True, slots=True)
+class TrainParams:
+    """Random Forest hyperparameters"""
+    n_estimators: int = 100
+    max_depth: int = 10
+    min_samples_split: int = 2
+    min_samples_leaf: int = 1
+    random_state: int = 42
+
+TRAIN_PARAMS: Final = TrainParams()
 
 # API settings
 API_HOST = "0.0.0.0"
 API_PORT = 8000
 API_TITLE = "Iris Classifier API"
+# Each worker keeps its own Prometheus registry, so a scrape only sees whichever
+# worker answered it; scale with replicas instead. (os.cpu_count() would also
+# report the host's cores, not the container's CPU limit.)
+API_WORKERS = int(os.getenv("API_WORKERS", "1"))
+
+# Prediction cache settings
+PREDICTION_CACHE_SIZE = 4096
+PREDICTION_CACHE_PRECISION = 2  # decimals kept when building cache keys
 
 # Feature names
-FEATURE_NAMES = ["sepal_length", "sepal_width", "petal_length", "petal_width"]
-CLASS_NAMES = ["setosa", "versicolor", "virginica"]
+FEATURE_NAMES: Final[Tuple[str, ...]] = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+CLASS_NAMES: Final[Tuple[str, ...]] = ("setosa", "versicolor", "virginica")
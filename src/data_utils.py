@@ -2,47 +2,52 @@
 Data loading and preprocessing utilities
 """
 
-import json
+from operator import itemgetter
 from pathlib import Path
 from typing import List, Tuple
 
+import numpy as np
+import orjson
+
+from src.config import FEATURE_NAMES
+
+SPECIES_MAP = {"setosa": 0, "versicolor": 1, "virginica": 2}
+
+# One float32 field per feature so samples can be packed in a single fromiter pass
+_FEATURE_DTYPE = np.dtype([(name, np.float32) for name in FEATURE_NAMES])
+
 def load_json_data(filepath: Path) -> List[dict]:
     """Load JSON data from file"""
-    with open(filepath, 'r') as f:
-        return json.load(f)
+    with open(filepath, 'rb') as f:
+        return orjson.loads(f.read())
 
-def extract_features_and_labels(data: List[dict]) -> Tuple[List[List[float]], List[int]]:
+def extract_features_and_labels(data: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
     """
     Extract features and labels from iris data
     
     Returns:
-        X: List of feature vectors (4 features each)
-        y: List of class labels (0, 1, 2)
+        X: Array of feature vectors, shape (n_samples, 4), float32
+        y: Array of class labels (0, 1, 2)
     """
-    species_map = {"setosa": 0, "versicolor": 1, "virginica": 2}
+    n_samples = len(data)
+    get_features = itemgetter(*FEATURE_NAMES)
     
-    X = []
-    y = []
+    X = np.fromiter(
+        (get_features(sample) for sample in data),
+        dtype=_FEATURE_DTYPE,
+        count=n_samples
+    ).view(np.float32).reshape(-1, len(FEATURE_NAMES))
     
-    for sample in data:
-        features = [
-            sample["sepal_length"],
-            sample["sepal_width"],
-            sample["petal_length"],
-            sample["petal_width"]
-        ]
-        X.append(features)
-        
-        # Use class_name field if available, otherwise class field
-        if "class_name" in sample:
-            label = species_map[sample["class_name"]]
-        else:
-            label = sample["class"]
-        y.append(label)
+    # Use class_name field if available, otherwise class field
+    if n_samples and "class_name" in data[0]:
+        labels = (SPECIES_MAP[sample["class_name"]] for sample in data)
+    else:
+        labels = (sample["class"] for sample in data)
+    y = np.fromiter(labels, dtype=np.int64, count=n_samples)
     
     return X, y
 
-def prepare_dataset(filepath: Path) -> Tuple[List[List[float]], List[int]]:
+def prepare_dataset(filepath: Path) -> Tuple[np.ndarray, np.ndarray]:
     """Load and prepare dataset in one step"""
     data = load_json_data(filepath)
     return extract_features_and_labels(data)
@@ -0,0 +1,169 @@
+"""
+Numba inference backend
+Flattens a trained RandomForest into compact contiguous arrays and evaluates it with a JIT kernel
+"""
+
+import logging
+import os
+from typing import List
+
+import numba
+import numpy as np
+from numba import njit, prange
+from sklearn.ensemble import RandomForestClassifier
+
+logger = logging.getLogger(__name__)
+
+# Kernels are launched from the batcher's worker threads; the TBB layer can hang
+# at interpreter exit in that case, so prefer OpenMP unless told otherwise
+if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+    numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+
+TREE_LEAF = -1
+
+
+# Trees evaluated between early-exit checks
+EARLY_EXIT_CHUNK = 8
+
+
+@njit(inline="always")
+def _find_leaf(X, i, t, feature, threshold, left, right):
+    """Walk tree t for sample i and return its leaf node index"""
+    node = 0
+    while left[t, node] != TREE_LEAF:
+        if X[i, feature[t, node]] <= threshold[t, node]:
+            node = left[t, node]
+        else:
+            node = right[t, node]
+    return node
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def forest_predict(X, feature, threshold, left, right, value, out):
+    """Accumulate per-tree leaf probabilities for every sample into out"""
+    n_trees = feature.shape[0]
+    n_classes = value.shape[2]
+    for i in prange(X.shape[0]):
+        for t in range(n_trees):
+            node = _find_leaf(X, i, t, feature, threshold, left, right)
+            for c in range(n_classes):
+                out[i, c] += value[t, node, c]
+
+
+@njit(parallel=True, fastmath=True, cache=True)
+def forest_predict_early_exit(X, feature, threshold, left, right, value, out, n_used, chunk):
+    """
+    Like forest_predict, but stop polling trees for a sample once its class is decided
+
+    Each tree adds at most 1 to any class, so once the leading class is ahead of
+    the runner-up by more than the number of trees left, the argmax can't change.
+    n_used receives how many trees were evaluated for each sample.
+    """
+    n_trees = feature.shape[0]
+    n_classes = value.shape[2]
+    for i in prange(X.shape[0]):
+        t = 0
+        while t < n_trees:
+            end = min(t + chunk, n_trees)
+            for tt in range(t, end):
+                node = _find_leaf(X, i, tt, feature, threshold, left, right)
+                for c in range(n_classes):
+                    out[i, c] += value[tt, node, c]
+            t = end
+
+            best = 0.0
+            second = 0.0
+            for c in range(n_classes):
+                v = out[i, c]
+                if v > best:
+                    second = best
+                    best = v
+                elif v > second:
+                    second = v
+            if best - second > n_trees - t:
+                break
+        n_used[i] = t
+
+
+class NumbaForest:
+    """Drop-in replacement for a RandomForest's predict_proba backed by a Numba kernel"""
+
+    def __init__(self, model: RandomForestClassifier, early_exit: bool = False, n_threads: int = 1):
+        self.early_exit = early_exit
+        self.n_threads = min(n_threads, numba.config.NUMBA_NUM_THREADS)
+        trees = [estimator.tree_ for estimator in model.estimators_]
+        n_trees = len(trees)
+        n_nodes = max(tree.node_count for tree in trees)
+        self.n_features = model.n_features_in_
+        self.n_classes = model.n_classes_
+
+        # Per-feature sorted split points; inputs and thresholds are both replaced
+        # by their rank among these, which preserves every x <= threshold decision
+        self.edges = [
+            np.unique(np.concatenate([
+                tree.threshold[(tree.children_left != TREE_LEAF) & (tree.feature == f)]
+                for tree in trees
+            ]))
+            for f in range(self.n_features)
+        ]
+        max_edges = max(len(edges) for edges in self.edges)
+        self.quant_dtype = np.uint16 if max_edges < 2**16 else np.uint32
+        child_dtype = np.int16 if n_nodes < 2**15 else np.int32
+        feature_dtype = np.uint8 if self.n_features < 2**8 else np.int32
+
+        # Structure-of-arrays layout, trees padded to the largest node count
+        self.feature = np.zeros((n_trees, n_nodes), dtype=feature_dtype)
+        self.threshold = np.zeros((n_trees, n_nodes), dtype=self.quant_dtype)
+        self.left = np.full((n_trees, n_nodes), TREE_LEAF, dtype=child_dtype)
+        self.right = np.full((n_trees, n_nodes), TREE_LEAF, dtype=child_dtype)
+        self.value = np.zeros((n_trees, n_nodes, self.n_classes), dtype=np.float32)
+
+        for t, tree in enumerate(trees):
+            n = tree.node_count
+            split = tree.children_left != TREE_LEAF
+            feature = np.where(split, tree.feature, 0)
+            self.feature[t, :n] = feature
+            for f in range(self.n_features):
+                mask = split & (feature == f)
+                self.threshold[t, :n][mask] = np.searchsorted(self.edges[f], tree.threshold[mask])
+            self.left[t, :n] = tree.children_left
+            self.right[t, :n] = tree.children_right
+            # Normalise leaf counts so each tree votes with class probabilities
+            counts = tree.value[:, 0, :]
+            totals = counts.sum(axis=1, keepdims=True)
+            self.value[t, :n] = np.divide(counts, totals, out=np.zeros_like(counts), where=totals > 0)
+
+        logger.info(
+            f"Numba forest ready ({n_trees} trees, up to {n_nodes} nodes each, "
+            f"{np.dtype(self.quant_dtype).name} thresholds, early exit: {early_exit})"
+        )
+
+    def quantize(self, X: List[List[float]]) -> np.ndarray:
+        """Map each feature value to the number of split points strictly below it"""
+        # sklearn compares float32 inputs against float64 thresholds
+        X = np.asarray(X, dtype=np.float32).astype(np.float64)
+        Xq = np.empty(X.shape, dtype=self.quant_dtype)
+        for f, edges in enumerate(self.edges):
+            Xq[:, f] = np.searchsorted(edges, X[:, f], side="left")
+        return Xq
+
+    def predict_proba(self, X: List[List[float]]) -> np.ndarray:
+        """Return class probabilities with shape (n_samples, n_classes)"""
+        # prange would otherwise use every core; the thread count is per calling
+        # thread, so set it here in the batcher's worker thread
+        numba.set_num_threads(self.n_threads)
+        Xq = self.quantize(X)
+        out = np.zeros((Xq.shape[0], self.n_classes), dtype=np.float32)
+        if not self.early_exit:
+            forest_predict(Xq, self.feature, self.threshold, self.left, self.right, self.value, out)
+            out /= self.feature.shape[0]
+            return out
+        
+        # Confidence is averaged over the trees actually evaluated for each sample
+        n_used = np.empty(Xq.shape[0], dtype=np.int32)
+        forest_predict_early_exit(
+            Xq, self.feature, self.threshold, self.left, self.right, self.value,
+            out, n_used, EARLY_EXIT_CHUNK
+        )
+        out /= n_used[:, None]
+        return out
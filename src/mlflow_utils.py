@@ -3,11 +3,14 @@ MLFlow utilities and helpers
 """
 
 import logging
+import os
+from functools import lru_cache
 from pathlib import Path
 from typing import Optional, Dict, Any
 
 import mlflow
 from mlflow.entities import Run
+from mlflow.tracking import MlflowClient
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +26,24 @@ def setup_mlflow_tracking(tracking_uri: str, experiment_name: str) -> None:
     mlflow.set_experiment(experiment_name)
     logger.info(f"MLFlow tracking configured: {tracking_uri}")
 
+def configure_http_client(timeout: int, max_retries: int) -> None:
+    """
+    Set MLFlow REST request timeout and retries, unless already set in the environment
+    
+    MLFlow keeps one pooled requests.Session per retry policy, so with a remote
+    tracking server these settings also decide which pooled session is reused.
+    """
+    os.environ.setdefault("MLFLOW_HTTP_REQUEST_TIMEOUT", str(timeout))
+    os.environ.setdefault("MLFLOW_HTTP_REQUEST_MAX_RETRIES", str(max_retries))
+
+@lru_cache(maxsize=None)
+def _client_for(tracking_uri: str) -> MlflowClient:
+    return MlflowClient(tracking_uri=tracking_uri)
+
+def get_client() -> MlflowClient:
+    """Get a shared MlflowClient for the current tracking URI"""
+    return _client_for(mlflow.get_tracking_uri())
+
 def get_or_create_experiment(experiment_name: str) -> str:
     """Get experiment ID, creating if necessary"""
     experiment = mlflow.get_experiment_by_name(experiment_name)
@@ -33,21 +54,18 @@ def get_or_create_experiment(experiment_name: str) -> str:
 
 def get_latest_run(experiment_name: str) -> Optional[Run]:
     """Get the latest completed run from an experiment"""
-    experiment = mlflow.get_experiment_by_name(experiment_name)
+    client = get_client()
+    experiment = client.get_experiment_by_name(experiment_name)
     if not experiment:
         return None
     
-    runs = mlflow.search_runs(
+    # MlflowClient.search_runs returns Run objects, avoiding a pandas DataFrame
+    runs = client.search_runs(
         experiment_ids=[experiment.experiment_id],
         order_by=["start_time DESC"],
         max_results=1
     )
-    # mlflow.search_runs returns a DataFrame, convert to list of Run objects
-    if not runs.empty:
-        client = mlflow.tracking.MlflowClient()
-        run_id = runs.iloc[0]['run_id']
-        return client.get_run(run_id)
-    return None
+    return runs[0] if runs else None
 
 def log_params_and_metrics(params: Dict[str, Any], metrics: Dict[str, float]) -> None:
     """Log parameters and metrics to MLFlow"""
@@ -2,22 +2,36 @@
 Model training and prediction utilities
 """
 
+import fcntl
 import logging
-from typing import List, Tuple, Dict, Any
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Dict, Any
 
+import joblib
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
 
+from src.config import TrainParams
+
 logger = logging.getLogger(__name__)
 
-def create_model(params: Dict[str, Any]) -> RandomForestClassifier:
+N_FEATURES = 4
+
+# Per-thread input buffers reused across predictions
+_TLS = threading.local()
+
+def create_model(params: TrainParams) -> RandomForestClassifier:
     """Create a Random Forest classifier with given parameters"""
     return RandomForestClassifier(
-        n_estimators=params.get("n_estimators", 100),
-        max_depth=params.get("max_depth", 10),
-        min_samples_split=params.get("min_samples_split", 2),
-        min_samples_leaf=params.get("min_samples_leaf", 1),
-        random_state=params.get("random_state", 42)
+        n_estimators=params.n_estimators,
+        max_depth=params.max_depth,
+        min_samples_split=params.min_samples_split,
+        min_samples_leaf=params.min_samples_leaf,
+        random_state=params.random_state
     )
 
 def train_model(
@@ -54,6 +68,122 @@ def evaluate_model(
     logger.info(f"Evaluation metrics ({set_name}): {metrics}")
     return metrics
 
+@contextmanager
+def model_cache_lock(cache_dir: Path) -> Iterator[None]:
+    """
+    Hold an exclusive file lock so only one process populates the model cache
+    
+    The cache is only an optimization: if the lock can't be created (read-only
+    or full filesystem) the body runs unlocked.
+    """
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        lock_file = open(cache_dir / "model.lock", "w")
+    except OSError as e:
+        logger.warning(f"Model cache lock unavailable, continuing without it: {e}")
+        yield
+        return
+    
+    with lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def load_cached_model(cache_dir: Path, run_id: str) -> Optional[RandomForestClassifier]:
+    """
+    Load the locally cached model if it was saved from the given MLFlow run
+    
+    Arrays are memory-mapped read-only so the load touches as little as possible.
+    
+    Returns:
+        Cached model, or None if missing, stale or unreadable
+    """
+    model_path = cache_dir / "model.joblib"
+    run_id_path = cache_dir / "model.run_id"
+    if not model_path.exists() or not run_id_path.exists():
+        return None
+    if run_id_path.read_text().strip() != run_id:
+        logger.info("Cached model is from a different run, ignoring it")
+        return None
+    
+    try:
+        return joblib.load(model_path, mmap_mode="r")
+    except Exception as e:
+        logger.warning(f"Failed to load cached model: {e}")
+        return None
+
+def save_cached_model(model: RandomForestClassifier, cache_dir: Path, run_id: str) -> None:
+    """
+    Save model uncompressed (so it can be memory-mapped) along with its run id
+    
+    Failures are logged and ignored; the caller keeps serving the model it has.
+    """
+    model_path = cache_dir / "model.joblib"
+    run_id_path = cache_dir / "model.run_id"
+    
+    # Write to temp files and rename so readers never see a partial file
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_model_path = model_path.with_suffix(".joblib.tmp")
+        joblib.dump(model, tmp_model_path, compress=0)
+        os.replace(tmp_model_path, model_path)
+        
+        tmp_run_id_path = run_id_path.with_suffix(".run_id.tmp")
+        tmp_run_id_path.write_text(run_id)
+        os.replace(tmp_run_id_path, run_id_path)
+    except OSError as e:
+        logger.warning(f"Failed to cache model: {e}")
+        return
+    logger.info(f"Model cached at {model_path}")
+
+def truncate_forest(model: RandomForestClassifier, n_estimators: int) -> RandomForestClassifier:
+    """Keep only the first n_estimators trees of a fitted forest (0 keeps all)"""
+    if 0 < n_estimators < len(model.estimators_):
+        model.estimators_ = model.estimators_[:n_estimators]
+        model.n_estimators = n_estimators
+    return model
+
+def build_predictor(
+    model: RandomForestClassifier,
+    backend: str = "sklearn",
+    early_exit: bool = False
+) -> Any:
+    """
+    Wrap a trained classifier in the requested inference backend
+    
+    Args:
+        model: Trained classifier
+        backend: 'sklearn' (use model as-is), 'onnx' (onnxruntime session)
+            or 'numba' (JIT-compiled tree evaluator)
+        early_exit: Stop evaluating trees once the vote is decided (numba only)
+        
+    Returns:
+        Object exposing predict_proba(X)
+    """
+    if backend == "sklearn":
+        return model
+    if backend == "onnx":
+        from src.onnx_utils import OnnxPredictor
+        return OnnxPredictor(model)
+    if backend == "numba":
+        from src.forest_kernel import NumbaForest
+        return NumbaForest(model, early_exit=early_exit)
+    raise ValueError(f"Unknown model backend: {backend}")
+
+def _input_buffer(n_samples: int) -> np.ndarray:
+    """
+    Return a C-contiguous float32 (n_samples, 4) view of this thread's input buffer
+    
+    The buffer already has the dtype and layout sklearn expects, so check_array
+    doesn't copy it; it only grows when a larger batch comes in.
+    """
+    buf = getattr(_TLS, "buf", None)
+    if buf is None or buf.shape[0] < n_samples:
+        buf = _TLS.buf = np.empty((n_samples, N_FEATURES), dtype=np.float32)
+    return buf[:n_samples]
+
 def make_prediction(model: RandomForestClassifier, features: List[float]) -> Tuple[int, float]:
     """
     Make a prediction for single sample
@@ -65,12 +195,32 @@ def make_prediction(model: RandomForestClassifier, features: List[float]) -> Tup
     Returns:
         (predicted_class, confidence)
     """
-    # Convert to 2D array for sklearn
-    sample = [features]
-    prediction = model.predict(sample)[0]
+    # Fill the reusable float32 buffer instead of allocating a new array
+    sample = _input_buffer(1)
+    sample[0] = features
     
-    # Get confidence (probability of predicted class)
+    # One predict_proba call; argmax is what predict() would return
     proba = model.predict_proba(sample)[0]
+    prediction = int(proba.argmax())
     confidence = float(proba[prediction])
     
     return prediction, confidence
+
+def predict_batch(model: RandomForestClassifier, samples: List[List[float]]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Make predictions for a batch of samples in a single predict_proba call
+    
+    Args:
+        model: Trained classifier
+        samples: List of feature vectors (4 iris features each)
+        
+    Returns:
+        (predicted_classes, confidences) as arrays of length len(samples)
+    """
+    X = _input_buffer(len(samples))
+    X[:] = samples
+    proba = model.predict_proba(X)
+    preds = proba.argmax(axis=1)
+    confidences = proba[np.arange(len(preds)), preds]
+    
+    return preds, confidences
@@ -0,0 +1,80 @@
+"""
+ONNX Runtime inference backend
+Converts a trained scikit-learn forest to ONNX and serves it from onnxruntime
+"""
+
+import logging
+from typing import List
+
+import numpy as np
+import onnxruntime as ort
+from skl2onnx import convert_sklearn
+from onnx import helper
+from skl2onnx.common.data_types import FloatTensorType
+from sklearn.ensemble import RandomForestClassifier
+
+logger = logging.getLogger(__name__)
+
+INPUT_NAME = "X"
+
+
+def _round_thresholds_down(onnx_model, model: RandomForestClassifier) -> None:
+    """
+    Replace each float32 split threshold with the largest float32 <= sklearn's
+    float64 one
+    
+    sklearn compares float32 inputs against float64 thresholds. A threshold
+    rounded to the nearest float32 can round up, sending an input equal to it
+    left in ONNX but right in sklearn; rounding down keeps every decision
+    identical. skl2onnx 1.16 already does this, but it is done here so it does
+    not depend on the converter version.
+    """
+    for node in onnx_model.graph.node:
+        if node.op_type != "TreeEnsembleClassifier":
+            continue
+        attrs = {attr.name: attr for attr in node.attribute}
+        tree_ids = attrs["nodes_treeids"].ints
+        node_ids = attrs["nodes_nodeids"].ints
+        modes = attrs["nodes_modes"].strings
+        values = np.array(attrs["nodes_values"].floats, dtype=np.float32)
+        for i, (t, n, mode) in enumerate(zip(tree_ids, node_ids, modes)):
+            if mode == b"LEAF":
+                continue
+            threshold = model.estimators_[t].tree_.threshold[n]
+            value = np.float32(threshold)
+            if value > threshold:
+                value = np.nextafter(value, np.float32(-np.inf))
+            values[i] = value
+        node.attribute.remove(attrs["nodes_values"])
+        node.attribute.append(helper.make_attribute("nodes_values", values.tolist()))
+
+
+class OnnxPredictor:
+    """Drop-in replacement for a classifier's predict_proba backed by onnxruntime"""
+
+    def __init__(self, model: RandomForestClassifier, n_features: int = 4, n_threads: int = 1):
+        # zipmap=False keeps probabilities as a (N, n_classes) tensor instead of a list of dicts
+        onnx_model = convert_sklearn(
+            model,
+            initial_types=[(INPUT_NAME, FloatTensorType([None, n_features]))],
+            options={id(model): {"zipmap": False}}
+        )
+        _round_thresholds_down(onnx_model, model)
+        # Batches already run in a worker thread; like sklearn's n_jobs=1, keep
+        # onnxruntime to one thread instead of a pool sized to every core
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = n_threads
+        options.inter_op_num_threads = n_threads
+        self.session = ort.InferenceSession(
+            onnx_model.SerializeToString(),
+            sess_options=options,
+            providers=["CPUExecutionProvider"]
+        )
+        # Outputs are (label, probabilities)
+        self._proba_output = self.session.get_outputs()[1].name
+        logger.info(f"ONNX model ready ({len(onnx_model.graph.node)} graph nodes)")
+
+    def predict_proba(self, X: List[List[float]]) -> np.ndarray:
+        """Return class probabilities with shape (n_samples, n_classes)"""
+        X = np.asarray(X, dtype=np.float32)
+        return self.session.run([self._proba_output], {INPUT_NAME: X})[0]
@@ -3,21 +3,32 @@ Prometheus metrics for monitoring ML model and API performance
 """
 
 from prometheus_client import Counter, Histogram, Gauge
-import time
+from prometheus_fastapi_instrumentator import Instrumentator, metrics
 
-# Request metrics
-request_count = Counter(
-    'iris_api_requests_total',
-    'Total number of API requests',
-    ['method', 'endpoint', 'status']
-)
+from src.config import CLASS_NAMES
+
+# Request metrics, keeping the iris_api_* names the dashboards use.
+# Built here rather than in serve.py: `python serve.py` imports serve twice
+# (as __main__ and again as serve:app), but this module only once.
+REQUEST_DURATION_BUCKETS = (0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0)
 
-request_duration = Histogram(
-    'iris_api_request_duration_seconds',
-    'API request duration in seconds',
-    ['endpoint'],
-    buckets=(0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0)
+instrumentator = Instrumentator(
+    should_group_status_codes=False,
+    excluded_handlers=["/metrics"],
+    should_instrument_requests_inprogress=True,
+    inprogress_name="iris_api_active_requests"
 )
+instrumentator.add(metrics.requests(
+    metric_name="iris_api_requests_total",
+    metric_doc="Total number of API requests"
+))
+instrumentator.add(metrics.latency(
+    metric_name="iris_api_request_duration_seconds",
+    metric_doc="API request duration in seconds",
+    should_include_method=False,
+    should_include_status=False,
+    buckets=REQUEST_DURATION_BUCKETS
+))
 
 # Prediction metrics
 prediction_count = Counter(
@@ -33,6 +44,17 @@ prediction_confidence = Histogram(
     buckets=(0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
 )
 
+# Prediction cache metrics
+cache_hits = Counter(
+    'iris_cache_hits_total',
+    'Total number of predictions served from the LRU cache'
+)
+
+cache_misses = Counter(
+    'iris_cache_misses_total',
+    'Total number of predictions that missed the LRU cache'
+)
+
 # Model metrics
 model_loaded = Gauge(
     'iris_model_loaded',
@@ -51,34 +73,16 @@ api_health = Gauge(
     'API health status (1=healthy, 0=unhealthy)'
 )
 
-active_requests = Gauge(
-    'iris_api_active_requests',
-    'Number of currently active requests'
-)
-
-
-class MetricsRecorder:
-    """Helper class to record metrics for requests"""
-    
-    def __init__(self, endpoint: str):
-        self.endpoint = endpoint
-        self.start_time = None
-    
-    def start(self):
-        """Start timing a request"""
-        self.start_time = time.time()
-        active_requests.inc()
-    
-    def end(self, status: int):
-        """End timing a request and record metrics"""
-        if self.start_time:
-            duration = time.time() - self.start_time
-            request_duration.labels(endpoint=self.endpoint).observe(duration)
-            request_count.labels(method='POST', endpoint=self.endpoint, status=status).inc()
-        active_requests.dec()
+# Prediction label children, one per class, bound once at import
+_prediction_count_children = {
+    name: prediction_count.labels(predicted_class=name) for name in CLASS_NAMES
+}
+_prediction_confidence_children = {
+    name: prediction_confidence.labels(predicted_class=name) for name in CLASS_NAMES
+}
 
 
 def record_prediction(predicted_class: str, confidence: float):
     """Record a prediction with its confidence score"""
-    prediction_count.labels(predicted_class=predicted_class).inc()
-    prediction_confidence.labels(predicted_class=predicted_class).observe(confidence)
+    _prediction_count_children[predicted_class].inc()
+    _prediction_confidence_children[predicted_class].observe(confidence)
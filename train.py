@@ -5,6 +5,8 @@ Uses source modules for configuration, data loading, and model utilities
 """
 
 import logging
+from dataclasses import asdict
+
 import mlflow
 import mlflow.sklearn
 
@@ -46,7 +48,7 @@ def main():
         model = train_model(model, X_train, y_train)
         
         # Log parameters to MLFlow
-        mlflow.log_params(TRAIN_PARAMS)
+        mlflow.log_params(asdict(TRAIN_PARAMS))
         
         # Evaluate on train and test sets
         train_metrics = evaluate_model(model, X_train, y_train, "train")